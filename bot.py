@@ -1,292 +1,403 @@
 import os
-import json
 import logging
 import asyncio
-import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from telegram import Update
+from telegram import Update, LinkPreviewOptions
+from telegram.error import RetryAfter
 from telegram.ext import (
     ApplicationBuilder, CommandHandler, ContextTypes
 )
 from telegram.constants import ChatAction
 from monitoring import (
-    DEVICE_LIST, archive_logs, safe_read_json, STATUS_DIR, DAILY_ACCUMULATOR_FILE,
-    generate_monthly_report, format_bytes_to_gb, ZoneInfo, STATE_FILE, send_telegram, LOG_DIR
+    DEVICE_LIST, archive_logs, cached_read_json, cached_read_bytes, json_loads, json_dumps,
+    STATUS_DIR, DAILY_ACCUMULATOR_FILE, IF_STATUS_UP,
+    generate_monthly_report, format_bytes_to_gb, split_message, escape_markdown, bold_markdown, report_current_month, TZ_JAKARTA, STATE_FILE, send_telegram, LOG_DIR
 )
 
 load_dotenv()
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+IO_WORKERS = int(os.getenv("BOT_IO_WORKERS", 8))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("TelegramBot")
 
+# Global sliding-window limiter for outgoing messages; Telegram allows ~30 msg/s per bot
+TG_RATE_LIMIT = 25
+_send_times = deque(maxlen=TG_RATE_LIMIT)
+_send_lock = asyncio.Lock()
+
+async def _throttle():
+    loop = asyncio.get_running_loop()
+    async with _send_lock:
+        if len(_send_times) == _send_times.maxlen:
+            wait = _send_times[0] + 1 - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        _send_times.append(loop.time())
+
+_NO_PREVIEW = LinkPreviewOptions(is_disabled=True)
+RAWDATA_INLINE_LIMIT = 1024  # bytes; larger status dumps are sent as a document
+
+async def _send_with_retry(send, **kwargs):
+    await _throttle()
+    try:
+        return await send(**kwargs)
+    except RetryAfter as e:
+        # Flood control hit anyway: wait as long as Telegram asks and retry once
+        delay = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+        logger.warning(f"Telegram flood control, retrying in {delay}s")
+        await asyncio.sleep(delay)
+        document = kwargs.get("document")
+        if hasattr(document, "seek"):
+            document.seek(0)
+        await _throttle()
+        return await send(**kwargs)
+
+async def safe_reply(message, text, **kwargs):
+    kwargs.setdefault("link_preview_options", _NO_PREVIEW)
+    return await _send_with_retry(message.reply_text, text=text, **kwargs)
+
+async def reply_chunked(message, text, **kwargs):
+    # Multi-device reports can exceed Telegram's message limit; send them in as few parts as possible
+    for chunk in split_message(text):
+        await safe_reply(message, chunk, **kwargs)
+
+async def safe_reply_document(message, **kwargs):
+    return await _send_with_retry(message.reply_document, **kwargs)
+
+# ifOperStatus -> label; anything other than up is reported as down
+_STAT = {IF_STATUS_UP: "✅ UP"}
+_STAT_DOWN = "❌ DOWN"
+
+# Row templates for the per-interface/per-device report loops
+_CPU_RAM_ROW = "{header}• CPU: {cpu:.1f}%\n• RAM: {ram:.1f}%\n\n"
+_IF_ROW = "• {name}: IN {i}, OUT {o}, ⬆️ {u} ⬇️ {d}, Status: {s}\n"
+_BW_ROW = "• {name}: IN {i}, OUT {o}\n"
+_BW_TOTAL = "📊 TOTAL: IN {i}, OUT {o}\n\n"
+
+DEVICE_BY_CASEFOLD = {d["name"].casefold(): d for d in DEVICE_LIST}
+DEV_HEADERS = {d["name"]: f"{d['name_bold']}\n" for d in DEVICE_LIST}
+IF_NAMES = {d["name"]: d["interfaces_md"] for d in DEVICE_LIST}
+
+# Markdown forms of names that only appear in data files (e.g. accumulator keys)
+_md = lru_cache(maxsize=None)(escape_markdown)
+_bold = lru_cache(maxsize=None)(bold_markdown)
+
+def _dev_header(name):
+    return DEV_HEADERS.get(name) or f"{_bold(name)}\n"
+
 def get_device_by_name(name: str):
-    for d in DEVICE_LIST:
-        if d["name"].lower() == name.lower():
-            return d
-    return None
+    return DEVICE_BY_CASEFOLD.get(name.casefold())
 
 def build_status_report():
-    report = "📡 *Live Status Monitoring*\n\n"
+    parts = ["📡 *Live Status Monitoring*\n\n"]
     for dev in DEVICE_LIST:
         name = dev["name"]
         status_file = STATUS_DIR / f"{name}.json"
-        status_data = safe_read_json(status_file)
+        status_data = cached_read_json(status_file)
         if not status_data:
-            report += f"*{name}*: ⚠️ No Data\n"
+            parts.append(f"{dev['name_bold']}: ⚠️ No Data\n")
             continue
 
-        report += f"*{name}*\n"
+        parts.append(DEV_HEADERS[name])
+        if_names = IF_NAMES[name]
         for if_index, state in status_data.items():
-            if_name = dev["interfaces"].get(if_index, f"if{if_index}")
-            stat = "✅ UP" if state["status"] == 1 else "❌ DOWN"
-            report += f"• {if_name}: {stat}\n"
-        report += "\n"
-    return report
+            if_name = if_names.get(if_index) or f"if{if_index}"
+            stat = _STAT.get(state["status"], _STAT_DOWN)
+            parts.append(f"• {if_name}: {stat}\n")
+        parts.append("\n")
+    return "".join(parts)
+
+# Per-device (avg_cpu, avg_ram), recomputed only when the cached accumulator object changes
+_averages_memo = (None, {})
+
+def device_averages(daily):
+    global _averages_memo
+    source, averages = _averages_memo
+    if source is not daily:
+        averages = {
+            name: (
+                (data["cpu_sum"] / data["cpu_count"]) if data["cpu_count"] else 0,
+                (data["ram_sum"] / data["ram_count"]) if data["ram_count"] else 0,
+            ) for name, data in daily["devices"].items()
+        }
+        _averages_memo = (daily, averages)
+    return averages
 
 def build_cpu_ram_report():
-    daily = safe_read_json(DAILY_ACCUMULATOR_FILE)
+    daily = cached_read_json(DAILY_ACCUMULATOR_FILE)
     if not daily: return "❌ Data accumulator tidak ditemukan."
 
-    report = "🧠 *CPU & RAM Usage Saat Ini*\n\n"
-    for name, data in daily["devices"].items():
-        avg_cpu = (data["cpu_sum"] / data["cpu_count"]) if data["cpu_count"] else 0
-        avg_ram = (data["ram_sum"] / data["ram_count"]) if data["ram_count"] else 0
-        report += f"*{name}*\n• CPU: {avg_cpu:.1f}%\n• RAM: {avg_ram:.1f}%\n\n"
-    return report
+    parts = ["🧠 *CPU & RAM Usage Saat Ini*\n\n"]
+    for name, (avg_cpu, avg_ram) in device_averages(daily).items():
+        parts.append(_CPU_RAM_ROW.format(header=_dev_header(name), cpu=avg_cpu, ram=avg_ram))
+    return "".join(parts)
+
+# Rendered report text per builder, reused while the cached accumulator object is unchanged
+_render_cache = {}
+
+def _render_cached(key, daily, render):
+    hit = _render_cache.get(key)
+    if hit and hit[0] is daily:
+        return hit[1]
+    text = render(daily)
+    _render_cache[key] = (daily, text)
+    return text
 
 def build_interface_traffic_report():
-    daily = safe_read_json(DAILY_ACCUMULATOR_FILE)
+    daily = cached_read_json(DAILY_ACCUMULATOR_FILE)
     if not daily: return "❌ Tidak ada data traffic."
+    return _render_cached("interfaces", daily, _render_interface_traffic)
 
-    report = "🌐 *Traffic & Interface Events*\n\n"
+def _render_interface_traffic(daily):
+    parts = ["🌐 *Traffic & Interface Events*\n\n"]
     for name, device in daily["devices"].items():
-        report += f"*{name}*\n"
+        parts.append(_dev_header(name))
         for if_name, data in device["interfaces"].items():
-            traffic_in = format_bytes_to_gb(data["total_in"])
-            traffic_out = format_bytes_to_gb(data["total_out"])
-            report += (
-                f"• {if_name}: IN {traffic_in}, OUT {traffic_out}, "
-                f"⬆️ {data['up_events']} ⬇️ {data['down_events']}, "
-                f"Status: {data['current_status']}\n"
-            )
-        report += "\n"
-    return report
+            parts.append(_IF_ROW.format(
+                name=_md(if_name), i=format_bytes_to_gb(data["total_in"]), o=format_bytes_to_gb(data["total_out"]),
+                u=data["up_events"], d=data["down_events"], s=data["current_status"]
+            ))
+        parts.append("\n")
+    return "".join(parts)
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/status command used")
-    await update.message.reply_text(build_status_report(), parse_mode="Markdown")
+    await reply_chunked(update.message, await asyncio.to_thread(build_status_report), parse_mode="Markdown")
 
 async def cpu_ram(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/cpu or /ram command used")
-    await update.message.reply_text(build_cpu_ram_report(), parse_mode="Markdown")
+    await reply_chunked(update.message, await asyncio.to_thread(build_cpu_ram_report), parse_mode="Markdown")
 
 async def interfaces(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/interfaces command used")
-    await update.message.reply_text(build_interface_traffic_report(), parse_mode="Markdown")
+    await reply_chunked(update.message, await asyncio.to_thread(build_interface_traffic_report), parse_mode="Markdown")
 
 async def summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/summary command used")
-    today = datetime.now(ZoneInfo("Asia/Jakarta")).strftime("%Y-%m-%d")
-    path = DAILY_ACCUMULATOR_FILE
-    if not os.path.exists(path):
-        await update.message.reply_text("❌ Tidak ada rekap hari ini.")
+    today = datetime.now(TZ_JAKARTA).date().isoformat()
+    data = await asyncio.to_thread(cached_read_json, DAILY_ACCUMULATOR_FILE)
+    if not data:
+        await safe_reply(update.message, "❌ Tidak ada rekap hari ini.")
         return
 
-    with open(path) as f:
-        data = json.load(f)
-
-    msg = f"📆 *Daily Summary - {today}*\n\n"
-    for name, dev_data in data["devices"].items():
-        cpu = (dev_data["cpu_sum"] / dev_data["cpu_count"]) if dev_data["cpu_count"] else 0
-        ram = (dev_data["ram_sum"] / dev_data["ram_count"]) if dev_data["ram_count"] else 0
-        msg += f"*{name}* - CPU: {cpu:.1f}%, RAM: {ram:.1f}%\n"
-    await update.message.reply_text(msg, parse_mode="Markdown")
+    parts = [f"📆 *Daily Summary - {today}*\n\n"]
+    for name, (cpu, ram) in device_averages(data).items():
+        parts.append(f"{_bold(name)} - CPU: {cpu:.1f}%, RAM: {ram:.1f}%\n")
+    await reply_chunked(update.message, "".join(parts), parse_mode="Markdown")
 
 async def report(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/report command used")
-    now = datetime.now(ZoneInfo("Asia/Jakarta"))
+    now = datetime.now(TZ_JAKARTA)
     last_month = now.replace(day=1) - timedelta(days=1)
     month_str = last_month.strftime("%Y-%m")
 
-    for d in DEVICE_LIST:
-        rep = generate_monthly_report(d["name"], month_str)
-        await update.message.reply_text(rep, parse_mode="Markdown")
+    reports = await asyncio.gather(*(
+        asyncio.to_thread(generate_monthly_report, d["name"], month_str) for d in DEVICE_LIST
+    ))
+    await reply_chunked(update.message, "\n---\n".join(reports), parse_mode="Markdown")
 
 async def device(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args
     if not args:
-        await update.message.reply_text("📟 Contoh: `/device Mikrotik1`", parse_mode="Markdown")
+        await safe_reply(update.message, "📟 Contoh: `/device Mikrotik1`", parse_mode="Markdown")
         return
 
     dev_name = " ".join(args)
     dev = get_device_by_name(dev_name)
     if not dev:
-        await update.message.reply_text(f"❌ Device `{dev_name}` gak ketemu.", parse_mode="Markdown")
+        await safe_reply(update.message, f"❌ Device `{dev_name}` gak ketemu.", parse_mode="Markdown")
         return
 
     status_file = STATUS_DIR / f"{dev['name']}.json"
-    status_data = safe_read_json(status_file)
+    status_data = await asyncio.to_thread(cached_read_json, status_file)
     if not status_data:
-        await update.message.reply_text(f"⚠️ No data untuk `{dev_name}`", parse_mode="Markdown")
+        await safe_reply(update.message, f"⚠️ No data untuk `{dev_name}`", parse_mode="Markdown")
         return
 
-    msg = f"*{dev_name}* status:\n"
+    parts = [f"{dev['name_bold']} status:\n"]
     for if_index, stat in status_data.items():
-        if_name = dev["interfaces"].get(if_index, f"if{if_index}")
-        msg += f"• {if_name}: {'✅ UP' if stat['status'] == 1 else '❌ DOWN'}\n"
-    await update.message.reply_text(msg, parse_mode="Markdown")
+        if_name = dev["interfaces_md"].get(if_index, f"if{if_index}")
+        parts.append(f"• {if_name}: {_STAT.get(stat['status'], _STAT_DOWN)}\n")
+    await reply_chunked(update.message, "".join(parts), parse_mode="Markdown")
     
 async def uptime(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/uptime command used")
     await update.message.chat.send_action(action=ChatAction.TYPING)
-    state = safe_read_json(STATE_FILE)
+    state = await asyncio.to_thread(cached_read_json, STATE_FILE)
     if not state:
-        await update.message.reply_text("❌ Uptime data tidak ditemukan.")
+        await safe_reply(update.message, "❌ Uptime data tidak ditemukan.")
         return
 
-    msg = "⏱️ *Device Uptime*\n\n"
+    parts = ["⏱️ *Device Uptime*\n\n"]
     for name, dev_data in state.get("devices", {}).items():
-        uptime_sec = dev_data.get("uptime", 0)
+        uptime_sec = int(dev_data.get("uptime", 0))
         uptime_str = format_seconds(uptime_sec)
-        msg += f"*{name}*: {uptime_str}\n"
-    await update.message.reply_text(msg, parse_mode="Markdown")
+        parts.append(f"{_bold(name)}: {uptime_str}\n")
+    await reply_chunked(update.message, "".join(parts), parse_mode="Markdown")
 
-def format_seconds(seconds):
-    minutes, sec = divmod(seconds, 60)
-    hours, minutes = divmod(minutes, 60)
-    days, hours = divmod(hours, 24)
-    return f"{int(days)}d {int(hours)}h {int(minutes)}m {int(sec)}s"
+@lru_cache(maxsize=65536)
+def format_seconds(seconds: int):
+    days, sec = divmod(seconds, 86400)
+    hours, sec = divmod(sec, 3600)
+    minutes, sec = divmod(sec, 60)
+    return f"{days}d {hours}h {minutes}m {sec}s"
 
 async def errors(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/errors command used")
     path = STATUS_DIR / "error_log.json"
-    if not path.exists():
-        await update.message.reply_text("✅ Tidak ada error tercatat.")
+    try:
+        raw = await asyncio.to_thread(path.read_bytes)
+    except FileNotFoundError:
+        await safe_reply(update.message, "✅ Tidak ada error tercatat.")
         return
 
-    err_data = safe_read_json(path)
+    try:
+        err_data = json_loads(raw)
+    except ValueError:
+        err_data = None
     if not err_data:
-        await update.message.reply_text("❌ Tidak ada data error valid.")
+        await safe_reply(update.message, "❌ Tidak ada data error valid.")
         return
 
-    msg = "🚨 *Device Errors Detected*\n\n"
+    parts = ["🚨 *Device Errors Detected*\n\n"]
     for name, errs in err_data.items():
-        msg += f"*{name}*:\n"
+        parts.append(f"{_bold(name)}:\n")
         for err in errs:
-            msg += f"• {err}\n"
-        msg += "\n"
-    await update.message.reply_text(msg, parse_mode="Markdown")
+            parts.append(f"• {escape_markdown(err)}\n")
+        parts.append("\n")
+    await reply_chunked(update.message, "".join(parts), parse_mode="Markdown")
+
+def read_status_pretty(file_path):
+    # Status files are written compactly; indent them again for people reading /rawdata
+    raw = cached_read_bytes(file_path)
+    if raw is None:
+        return None
+    try:
+        return json_dumps(json_loads(raw), pretty=True)
+    except ValueError:
+        return raw
 
 async def rawdata(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/rawdata command used")
     args = context.args
     if not args:
-        await update.message.reply_text("🧾 Contoh: `/rawdata Mikrotik1`", parse_mode="Markdown")
+        await safe_reply(update.message, "🧾 Contoh: `/rawdata Mikrotik1`", parse_mode="Markdown")
         return
 
     dev_name = " ".join(args)
     dev = get_device_by_name(dev_name)
     if not dev:
-        await update.message.reply_text(f"❌ Device `{dev_name}` tidak ditemukan.", parse_mode="Markdown")
+        await safe_reply(update.message, f"❌ Device `{dev_name}` tidak ditemukan.", parse_mode="Markdown")
         return
 
     file_path = STATUS_DIR / f"{dev['name']}.json"
-    if not file_path.exists():
-        await update.message.reply_text(f"❌ Tidak ada data untuk `{dev_name}`", parse_mode="Markdown")
+    # Read off the event loop; large files are then sent as a document instead of inline
+    raw = await asyncio.to_thread(read_status_pretty, file_path)
+    if raw is None:
+        await safe_reply(update.message, f"❌ Tidak ada data untuk `{dev_name}`", parse_mode="Markdown")
         return
-
-    with open(file_path, "r", encoding="utf-8") as f:
-        raw = f.read()
-        if len(raw) > 4000:
-            await update.message.reply_text("📦 File terlalu besar. Cek via file terlampir.")
-            await update.message.reply_document(document=file_path.open("rb"), filename=f"{dev['name']}_status.json")
-        else:
-            await update.message.reply_text(f"```json\n{raw}```", parse_mode="Markdown")
+    if len(raw) > RAWDATA_INLINE_LIMIT:
+        await safe_reply(update.message, "📦 File terlalu besar. Cek via file terlampir.")
+        await safe_reply_document(update.message, document=raw, filename=f"{dev['name']}_status.json")
+        return
+    await safe_reply(update.message, f"```json\n{raw.decode('utf-8')}```", parse_mode="Markdown")
 
 async def restart(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.warning("Manual restart triggered!")
-    await update.message.reply_text("♻️ Restarting bot process...")
-    os.execv(sys.executable, ['python'] + sys.argv)
+    await safe_reply(update.message, "♻️ Restarting bot process...")
+    # Shut down cleanly; the process supervisor (systemd/supervisor/Docker) starts it again
+    context.application.stop_running()
 
 async def bandwidth(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/bandwidth command used")
-    daily = safe_read_json(DAILY_ACCUMULATOR_FILE)
+    daily = await asyncio.to_thread(cached_read_json, DAILY_ACCUMULATOR_FILE)
     if not daily:
-        await update.message.reply_text("❌ Tidak ada data bandwidth.")
+        await safe_reply(update.message, "❌ Tidak ada data bandwidth.")
         return
 
-    msg = "📶 *Bandwidth Usage Hari Ini*\n\n"
+    await reply_chunked(update.message, _render_cached("bandwidth", daily, _render_bandwidth), parse_mode="Markdown")
+
+def _render_bandwidth(daily):
+    parts = ["📶 *Bandwidth Usage Hari Ini*\n\n"]
     for name, device in daily["devices"].items():
         total_in = 0
         total_out = 0
-        msg += f"*{name}*\n"
+        parts.append(_dev_header(name))
         for if_name, if_data in device["interfaces"].items():
-            in_gb = format_bytes_to_gb(if_data["total_in"])
-            out_gb = format_bytes_to_gb(if_data["total_out"])
-            msg += f"• {if_name}: IN {in_gb}, OUT {out_gb}\n"
+            parts.append(_BW_ROW.format(
+                name=_md(if_name), i=format_bytes_to_gb(if_data["total_in"]), o=format_bytes_to_gb(if_data["total_out"])
+            ))
             total_in += if_data["total_in"]
             total_out += if_data["total_out"]
-        msg += f"📊 TOTAL: IN {format_bytes_to_gb(total_in)}, OUT {format_bytes_to_gb(total_out)}\n\n"
-
-    await update.message.reply_text(msg, parse_mode="Markdown")
+        parts.append(_BW_TOTAL.format(i=format_bytes_to_gb(total_in), o=format_bytes_to_gb(total_out)))
+    return "".join(parts)
 
 
 
 async def report_and_tar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("/reportandtar manual monthly trigger")
-    await update.message.reply_text("🔄 Sedang membuat laporan & arsip bulan ini...")
+    await safe_reply(update.message, "🔄 Sedang membuat laporan bulan berjalan...")
 
     try:
-        # Trigger manual rotation (simulate new month)
-        flush_today_to_summary()
-        rotate_monthly_logs()
+        # Month-to-date report only: the live month is archived by the collector once it is closed
+        sent = await asyncio.to_thread(report_current_month)
+        if not sent:
+            await safe_reply(update.message, "ℹ️ Belum ada data bulan ini untuk dilaporkan.")
+            return
 
-
-        await update.message.reply_text("✅ Monthly report & log archive selesai dibikin.", parse_mode="Markdown")
+        await safe_reply(update.message, "✅ Laporan bulan berjalan terkirim. Arsip dibuat otomatis saat bulan berganti.")
     except Exception as e:
         logger.error(f"Error in report_and_tar: {e}")
-        await update.message.reply_text(f"❌ Gagal generate: {e}")
+        await safe_reply(update.message, f"❌ Gagal generate: {e}")
 
 
 async def command_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    cmds = [
-        "/status - Lihat semua status device",
-        "/cpu - Rata-rata penggunaan CPU",
-        "/ram - Rata-rata penggunaan RAM",
-        "/interfaces - Info semua interface",
-        "/summary - Ringkasan penggunaan hari ini",
-        "/report - Laporan bulanan terakhir",
-        "/device <nama> - Info device spesifik",
-        "/uptime - Perkiraan uptime per device",
-        "/errors - Cek error terbaru",
-        "/rawdata <device> - Dump raw JSON status",
-        "/restart - Restart bot (manual)",
-        "/bandwidth - Bandwidth Usage Hari Ini",
-        "/help - List semua command"
-    ]
-    await update.message.reply_text("📖 *Daftar Perintah:*\n\n" + "\n".join(cmds), parse_mode="Markdown")
+    await safe_reply(update.message, _HELP_TEXT, parse_mode="Markdown")
+
+# (command, handler, help line) - entries without a help line are registered but not listed in /help
+_HANDLERS = (
+    ("status", status, "/status - Lihat semua status device"),
+    ("cpu", cpu_ram, "/cpu - Rata-rata penggunaan CPU"),
+    ("ram", cpu_ram, "/ram - Rata-rata penggunaan RAM"),
+    ("interfaces", interfaces, "/interfaces - Info semua interface"),
+    ("summary", summary, "/summary - Ringkasan penggunaan hari ini"),
+    ("report", report, "/report - Laporan bulanan terakhir"),
+    ("device", device, "/device <nama> - Info device spesifik"),
+    ("uptime", uptime, "/uptime - Perkiraan uptime per device"),
+    ("errors", errors, "/errors - Cek error terbaru"),
+    ("rawdata", rawdata, "/rawdata <device> - Dump raw JSON status"),
+    ("restart", restart, "/restart - Restart bot (manual)"),
+    ("bandwidth", bandwidth, "/bandwidth - Bandwidth Usage Hari Ini"),
+    ("help", command_list, "/help - List semua command"),
+    ("commands", command_list, None),  # alt name
+    ("reportandtar", report_and_tar, None),
+)
+
+_HELP_TEXT = "📖 *Daftar Perintah:*\n\n" + "\n".join(doc for _, _, doc in _HANDLERS if doc)
 
 def main():
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
-
-    app.add_handler(CommandHandler("status", status))
-    app.add_handler(CommandHandler("cpu", cpu_ram))
-    app.add_handler(CommandHandler("ram", cpu_ram))
-    app.add_handler(CommandHandler("interfaces", interfaces))
-    app.add_handler(CommandHandler("summary", summary))
-    app.add_handler(CommandHandler("report", report))
-    app.add_handler(CommandHandler("device", device))
-    app.add_handler(CommandHandler("uptime", uptime))
-    app.add_handler(CommandHandler("errors", errors))
-    app.add_handler(CommandHandler("rawdata", rawdata))
-    app.add_handler(CommandHandler("restart", restart))
-    app.add_handler(CommandHandler("help", command_list))
-    app.add_handler(CommandHandler("commands", command_list))  # alt name
-    app.add_handler(CommandHandler("bandwidth", bandwidth))
-    app.add_handler(CommandHandler("reportandtar", report_and_tar))
+    # Dedicated pool for asyncio.to_thread file reads, shared by all handlers
+    io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+    async def post_init(app):
+        asyncio.get_running_loop().set_default_executor(io_executor)
+
+    async def post_shutdown(app):
+        io_executor.shutdown(wait=False)
+
+    app = ApplicationBuilder().token(TELEGRAM_TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
 
+    # One CommandHandler per callback; aliases (/cpu + /ram, /help + /commands) share a command set
+    commands_by_handler = {}
+    for name, handler, _ in _HANDLERS:
+        commands_by_handler.setdefault(handler, []).append(name)
+    for handler, names in commands_by_handler.items():
+        app.add_handler(CommandHandler(frozenset(names), handler))
 
     logger.info("🤖 Monitoring Bot is ALIVE.")
     app.run_polling()
@@ -1,21 +1,30 @@
 # monitoring_refactored_cleaned.py
 
 import os
+import atexit
 import sys
 import json
 import time
 import logging
 import shutil
+import tarfile
 import random
+import queue
 from pathlib import Path
+from urllib.parse import urlencode
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from threading import Lock
+from threading import Lock, Thread, local, get_ident
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from pysnmp.hlapi import (
     SnmpEngine,
     CommunityData,
@@ -33,6 +42,7 @@ BASE_DIR = Path(__file__).resolve().parent
 LOG_DIR = BASE_DIR / "logs"
 SCRIPT_LOG_DIR = BASE_DIR / "script_logs"
 STATUS_DIR = BASE_DIR / "status"
+DEVICES_FILE = BASE_DIR / "devices.json"
 STATE_FILE = STATUS_DIR / "script_state.json"
 DAILY_ACCUMULATOR_FILE = STATUS_DIR / "daily_accumulator.json"
 
@@ -46,10 +56,15 @@ log_file = SCRIPT_LOG_DIR / "monitoring_script.log"
 file_handler = TimedRotatingFileHandler(log_file, when="midnight", backupCount=7, encoding="utf-8")
 file_handler.setFormatter(log_formatter)
 
+# Worker threads only enqueue records; one listener thread formats, writes and rotates
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, file_handler, logging.StreamHandler(sys.stdout), respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler(sys.stdout))
+logger.addHandler(QueueHandler(log_queue))
 
 # ========== CONSTANTS ==========
 IF_STATUS_UP = 1
@@ -59,6 +74,8 @@ DEFAULT_TIMEOUT = 2
 OID_STATUS_BASE = "1.3.6.1.2.1.2.2.1.8"
 OID_32BIT = {"in": "1.3.6.1.2.1.2.2.1.10", "out": "1.3.6.1.2.1.2.2.1.16"}
 OID_64BIT = {"in": "1.3.6.1.2.1.31.1.1.1.6", "out": "1.3.6.1.2.1.31.1.1.1.10"}
+TZ_JAKARTA = ZoneInfo("Asia/Jakarta")
+TELEGRAM_MAX_MESSAGE = 4000  # Telegram rejects texts over 4096 chars; keep some margin
 
 # ========== ENV VARS ==========
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -66,55 +83,187 @@ CHAT_IDS = list(filter(None, map(str.strip, os.getenv("TELEGRAM_CHAT_IDS", "").s
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", 60))
 DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", 10))
+MAX_ERROR_BACKOFF = CHECK_INTERVAL * 4
 
 # ========== LOCKS FOR FILE I/O ==========
 file_locks = {}
+_locks_guard = Lock()
 
 def get_lock(path: Path) -> Lock:
     path_str = str(path)
-    if path_str not in file_locks:
-        file_locks[path_str] = Lock()
-    return file_locks[path_str]
-
-def safe_write_json(data, file_path: Path):
-    with get_lock(file_path):
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+    lock = file_locks.get(path_str)
+    if lock is None:
+        # Two threads may ask for a new path at once; only one Lock must win
+        with _locks_guard:
+            lock = file_locks.setdefault(path_str, Lock())
+    return lock
+
+def safe_write_json(data, file_path: Path, *, pretty=False):
+    # Serialize in one call before taking the lock; indent only for hand-edited files
+    payload = json_dumps(data, pretty=pretty)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write a private temp file, then atomically swap it in: readers (incl. the bot process)
+    # never see a half-written file and the lock is only held for the rename
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.{get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        with get_lock(file_path):
+            os.replace(tmp_path, file_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def json_dumps(data, pretty=False) -> bytes:
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2) if pretty else orjson.dumps(data)
+    text = json.dumps(data, indent=2) if pretty else json.dumps(data, separators=(",", ":"))
+    return text.encode("utf-8")
+
+def json_loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
 
 def safe_read_json(file_path: Path, default=None):
     with get_lock(file_path):
-        if not file_path.exists():
-            return default or {}
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return json_loads(file_path.read_bytes())
+        except FileNotFoundError:
+            return default or {}
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Gagal membaca {file_path}: {e}")
             return default or {}
 
+# ========== CACHED READS ==========
+# Parsed/raw file contents keyed by path, reused while (mtime_ns, size) is unchanged.
+# Cached objects are shared between callers and must be treated as read-only.
+_json_cache = {}
+_raw_cache = {}
+
+def _file_signature(file_path: Path):
+    try:
+        st = file_path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def cached_read_json(file_path: Path, default=None):
+    sig = _file_signature(file_path)
+    if sig is None:
+        _json_cache.pop(file_path, None)
+        return default or {}
+    hit = _json_cache.get(file_path)
+    if hit and hit[0] == sig:
+        return hit[1]
+    data = safe_read_json(file_path, default)
+    if data:
+        _json_cache[file_path] = (sig, data)
+    return data
+
+def cached_read_bytes(file_path: Path):
+    sig = _file_signature(file_path)
+    if sig is None:
+        _raw_cache.pop(file_path, None)
+        return None
+    hit = _raw_cache.get(file_path)
+    if hit and hit[0] == sig:
+        return hit[1]
+    try:
+        with get_lock(file_path):
+            raw = file_path.read_bytes()
+    except OSError as e:
+        logger.error(f"Gagal membaca {file_path}: {e}")
+        return None
+    _raw_cache[file_path] = (sig, raw)
+    return raw
+
 # ========== TELEGRAM NOTIFY ==========
+# Shared session keeps the TLS connection to api.telegram.org alive between alerts
+TG_URL = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+_tg_session = requests.Session()
+_tg_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(4, len(CHAT_IDS)), max_retries=0))
+
+# One worker per chat so a slow chat doesn't delay the others; threads are only started on first use
+_tg_executor = ThreadPoolExecutor(max_workers=max(1, len(CHAT_IDS)), thread_name_prefix="telegram")
+
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+def _retry_after(resp) -> int:
+    # Telegram puts the flood wait in the JSON body (parameters.retry_after); the header is not reliable
+    try:
+        retry_after = resp.json().get("parameters", {}).get("retry_after")
+    except ValueError:
+        retry_after = None
+    if retry_after is None:
+        retry_after = resp.headers.get("Retry-After", 1)
+    return int(retry_after)
+
+def _send_chat(chat_id, bodies):
+    # Parts of one message must arrive in order, so a chat's chunks are sent sequentially
+    prefix = urlencode({"chat_id": chat_id}).encode("ascii") + b"&"
+    for body in bodies:
+        try:
+            payload = prefix + body
+            resp = _tg_session.post(TG_URL, data=payload, headers=_FORM_HEADERS, timeout=5)
+            if resp.status_code == 429:
+                # Flood limit: wait exactly as long as Telegram asks, then retry once
+                retry_after = _retry_after(resp)
+                logger.warning(f"Telegram rate limit for {chat_id}, retrying in {retry_after}s")
+                time.sleep(retry_after)
+                resp = _tg_session.post(TG_URL, data=payload, headers=_FORM_HEADERS, timeout=5)
+                if not resp.ok:
+                    logger.error(f"Telegram retry to {chat_id} failed ({resp.status_code}), alert dropped: {resp.text[:200]}")
+        except requests.RequestException as e:
+            logger.error(f"Telegram error to {chat_id}: {e}")
+
 def send_telegram(message: str, force=False):
     if not BOT_TOKEN or (DEBUG_MODE and not force):
         logger.info(f"[DEBUG] Telegram Message:\n{message}")
         return
 
-    for chat_id in CHAT_IDS:
-        try:
-            payload = {
-                "chat_id": chat_id,
-                "text": message,
-                "parse_mode": "Markdown"
-            }
-            requests.post(f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage", data=payload, timeout=5)
-        except requests.RequestException as e:
-            logger.error(f"Telegram error to {chat_id}: {e}")
+    # A cycle's alerts are sent as one message; only split when it exceeds Telegram's limit
+    # Form-encode each part once and reuse it for every chat; only chat_id differs per request
+    bodies = [urlencode({"text": chunk, "parse_mode": "Markdown"}).encode("ascii") for chunk in split_message(message)]
+    if len(CHAT_IDS) == 1:
+        _send_chat(CHAT_IDS[0], bodies)
+        return
+    # Fan out across chats and wait, so callers still return after everything was sent
+    for future in [_tg_executor.submit(_send_chat, chat_id, bodies) for chat_id in CHAT_IDS]:
+        future.result()
 
 # ========== FORMATTERS ==========
+_BYTES_TO_GB = 1 / 1024**3
+
 def format_bytes_to_gb(byte_count: int) -> str:
-    if not isinstance(byte_count, (int, float)) or byte_count < 0:
+    # Callers pass the integer totals from the accumulator/summary files; only guard the sign
+    if byte_count < 0:
         return "0.00 GB"
-    return f"{byte_count / (1024**3):.2f} GB"
+    return "%.2f GB" % (byte_count * _BYTES_TO_GB)
+
+_MD_SPECIAL = str.maketrans({c: "\\" + c for c in "_*`["})
+
+def escape_markdown(text) -> str:
+    # Telegram legacy Markdown: escape the characters that open an entity (outside entities only)
+    return str(text).translate(_MD_SPECIAL)
+
+def bold_markdown(text) -> str:
+    # Legacy Markdown has no escapes inside an entity; close and reopen the bold around each '*'
+    return "\\*".join(f"*{part}*" if part else "" for part in str(text).split("*"))
+
+def split_message(text: str, limit=TELEGRAM_MAX_MESSAGE) -> list:
+    # Split on line boundaries so Markdown entities stay within one chunk
+    chunks, current, size = [], [], 0
+    for line in text.splitlines(keepends=True):
+        if size + len(line) > limit and current:
+            chunks.append("".join(current))
+            current, size = [], 0
+        while len(line) > limit:
+            chunks.append(line[:limit])
+            line = line[limit:]
+        current.append(line)
+        size += len(line)
+    if current:
+        chunks.append("".join(current))
+    return chunks or [text]
 
 # ========== DEVICE LOADING ==========
 def validate_device(dev):
@@ -127,25 +276,73 @@ def validate_device(dev):
     if not isinstance(dev["interfaces"], dict) or not dev["interfaces"]:
         raise ValueError(f"Device {dev['name']} interfaces must be non-empty dict.")
 
+# mtime_ns of devices.json when DEVICE_LIST was last (re)built
+_devices_lock = Lock()
+_devices_mtime = None
+
+def read_devices():
+    global _devices_mtime
+    mtime = DEVICES_FILE.stat().st_mtime_ns
+    with open(DEVICES_FILE, "r", encoding="utf-8") as f:
+        devices = json.load(f)
+    if not isinstance(devices, list):
+        raise ValueError("devices.json must contain a list")
+    for d in devices:
+        validate_device(d)
+    _devices_mtime = mtime
+    return devices
+
 def load_devices():
     try:
-        with open(BASE_DIR / "devices.json", "r", encoding="utf-8") as f:
-            devices = json.load(f)
-        if not isinstance(devices, list):
-            raise ValueError("devices.json must contain a list")
-        for d in devices:
-            validate_device(d)
-        return devices
+        return read_devices()
     except Exception as e:
         logger.error(f"Gagal memuat devices.json: {e}")
         sys.exit(1)
 
-DEVICE_LIST = load_devices()
+def reload_devices_if_changed() -> bool:
+    """Rebind DEVICE_LIST to a freshly built list when devices.json changed on disk; keeps the old list on errors.
+
+    The old list object is never mutated, so threads iterating it (e.g. the monthly worker) are unaffected."""
+    global _devices_mtime, DEVICE_LIST
+    try:
+        mtime = DEVICES_FILE.stat().st_mtime_ns
+    except OSError:
+        return False
+    if mtime == _devices_mtime:
+        return False
+    try:
+        devices = [prepare_device(d) for d in read_devices()]
+    except Exception as e:
+        # Don't retry (and re-log) the same broken file every cycle
+        _devices_mtime = mtime
+        logger.error(f"Gagal memuat ulang devices.json, tetap memakai konfigurasi lama: {e}")
+        return False
+    with _devices_lock:
+        DEVICE_LIST = devices
+    logger.info(f"devices.json dimuat ulang: {len(devices)} device.")
+    return True
+
+def prepare_device(dev):
+    # OIDs only depend on devices.json, so build them once instead of every cycle
+    oid_map = build_oid_map(dev)
+    all_oids = list(dev["oids"].values()) + list(oid_map.values())
+    # pysnmp resolves an ObjectType against the MIB once and keeps it, so reuse them across cycles
+    dev["_object_types"] = tuple(ObjectType(ObjectIdentity(oid)) for oid in all_oids)
+    # snmp_get_batch returns values in request order; store positions instead of OID strings
+    pos = {oid: i for i, oid in enumerate(all_oids)}
+    dev["_oid_pos"] = {key: pos[oid] for key, oid in dev["oids"].items()}
+    # (if_index, if_name, status_pos, in_pos, out_pos) per interface, walked by process_device
+    dev["_if_oids"] = [
+        (idx, if_name, pos[oid_map[f"status_{idx}"]], pos[oid_map[f"in_{idx}"]], pos[oid_map[f"out_{idx}"]])
+        for idx, if_name in dev["interfaces"].items()
+    ]
+    dev["name_bold"] = bold_markdown(dev["name"])
+    dev["interfaces_md"] = {idx: escape_markdown(n) for idx, n in dev["interfaces"].items()}
+    return dev
+
 
 # ========== SNMP BATCH ==========
-def snmp_get_batch(snmp_engine, oids: list, ip: str, community: str, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT):
-    object_types = [ObjectType(ObjectIdentity(oid)) for oid in oids]
-    
+def snmp_get_batch(snmp_engine, object_types: tuple, ip: str, community: str, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT):
     for attempt in range(retries):
         try:
             errorIndication, errorStatus, _, varBinds = next(
@@ -161,7 +358,8 @@ def snmp_get_batch(snmp_engine, oids: list, ip: str, community: str, retries=DEF
                 raise ConnectionError(errorIndication)
             if errorStatus:
                 raise RuntimeError(errorStatus.prettyPrint())
-            return {str(vb[0]): str(vb[1]) for vb in varBinds}
+            # getCmd answers in request order, so callers index values by position
+            return [str(vb[1]) for vb in varBinds]
         except Exception as e:
             logger.warning(f"[{ip}] SNMP error: {e} (attempt {attempt+1}/{retries})")
             time.sleep(1)
@@ -177,16 +375,27 @@ def build_oid_map(device):
         oid_map[f"out_{if_index}"] = f"{base_oid['out']}.{if_index}"
     return oid_map
 
+DEVICE_LIST = [prepare_device(d) for d in load_devices()]
+
+# pysnmp engines are not thread-safe; each polling thread keeps and reuses its own
+_snmp_local = local()
+
+def get_snmp_engine() -> SnmpEngine:
+    engine = getattr(_snmp_local, "engine", None)
+    if engine is None:
+        engine = _snmp_local.engine = SnmpEngine()
+    return engine
+
 def process_device(device, prev_status):
-    snmp_engine = SnmpEngine()
     name = device["name"]
     ip = device["ip"]
+    snmp_engine = get_snmp_engine()
+    name_bold = device["name_bold"]
     community = device["community"]
     use_64bit = device.get("use_64bit_counters", False)
 
-    oid_map = build_oid_map(device)
-    all_oids = list(device["oids"].values()) + list(oid_map.values())
-    snmp_results = snmp_get_batch(snmp_engine, all_oids, ip, community)
+    oid_pos = device["_oid_pos"]
+    snmp_results = snmp_get_batch(snmp_engine, device["_object_types"], ip, community)
 
     if snmp_results is None:
         logger.error(f"{name} ({ip}) unreachable via SNMP.")
@@ -197,27 +406,31 @@ def process_device(device, prev_status):
     new_status = {}
 
     try:
-        cpu = int(snmp_results[device["oids"]["cpu"]])
-        ram_total = int(snmp_results[device["oids"]["ram_total"]])
-        ram_used = int(snmp_results[device["oids"]["ram_used"]])
+        cpu = int(snmp_results[oid_pos["cpu"]])
+        ram_total = int(snmp_results[oid_pos["ram_total"]])
+        ram_used = int(snmp_results[oid_pos["ram_used"]])
         ram_pct = (ram_used / ram_total * 100) if ram_total > 0 else 0
 
         accumulator["cpu"] = cpu
         accumulator["ram"] = round(ram_pct, 2)
 
         if cpu > device.get("cpu_alert_threshold", 85):
-            alerts.append(f"🔥 *{name}* CPU Usage tinggi: *{cpu}%*")
+            alerts.append(f"🔥 {name_bold} CPU Usage tinggi: *{cpu}%*")
         if ram_pct > device.get("ram_alert_threshold", 90):
-            alerts.append(f"⚠️ *{name}* RAM Usage tinggi: *{ram_pct:.1f}%*")
+            alerts.append(f"⚠️ {name_bold} RAM Usage tinggi: *{ram_pct:.1f}%*")
     except Exception as e:
         logger.warning(f"[{name}] CPU/RAM parsing error: {e}")
 
     changes = []
-    for if_index, if_name in device["interfaces"].items():
+    acc_interfaces = accumulator["interfaces"]
+    max_counter = 2**64 if use_64bit else 2**32
+    counter_mask = max_counter - 1
+    counter_half = max_counter >> 1
+    for if_index, if_name, status_pos, in_pos, out_pos in device["_if_oids"]:
         try:
-            status = int(snmp_results[oid_map[f"status_{if_index}"]])
-            in_val = int(snmp_results[oid_map[f"in_{if_index}"]])
-            out_val = int(snmp_results[oid_map[f"out_{if_index}"]])
+            status = int(snmp_results[status_pos])
+            in_val = int(snmp_results[in_pos])
+            out_val = int(snmp_results[out_pos])
         except Exception as e:
             logger.warning(f"[{name} - {if_name}] Interface data error: {e}")
             continue
@@ -230,26 +443,23 @@ def process_device(device, prev_status):
             down_count += 1
             # Kirim notifikasi TEPAT saat hitungan mencapai 2
             if down_count == 2:
-                changes.append(f"*{name} - {if_name}* ❌ *DOWN*")
+                changes.append(f"{bold_markdown(f'{name} - {if_name}')} ❌ *DOWN*")
                 down_event = 1
         else: # Ini berarti status == IF_STATUS_UP
             # Jika sebelumnya sudah dianggap down (hitungan >= 2), berarti ini event "UP"
             if prev.get("down_count", 0) >= 2:
-                changes.append(f"*{name} - {if_name}* ✅ *UP*")
+                changes.append(f"{bold_markdown(f'{name} - {if_name}')} ✅ *UP*")
                 up_event = 1
             # Reset counter setiap kali statusnya UP
             down_count = 0
 
-        max_counter = 2**64 if use_64bit else 2**32
-        prev_in = prev.get("in", in_val)
-        prev_out = prev.get("out", in_val)
-        delta_in = in_val - prev_in if in_val >= prev_in else (max_counter - prev_in + in_val)
-        delta_out = out_val - prev_out if out_val >= prev_out else (max_counter - prev_out + out_val)
-
-        if delta_in > max_counter // 2: delta_in = 0
-        if delta_out > max_counter // 2: delta_out = 0
+        # Modular subtraction handles a single counter wrap; anything past half the range is a reset
+        delta_in = (in_val - prev.get("in", in_val)) & counter_mask
+        delta_out = (out_val - prev.get("out", out_val)) & counter_mask
+        if delta_in > counter_half: delta_in = 0
+        if delta_out > counter_half: delta_out = 0
 
-        accumulator["interfaces"][if_name] = {
+        acc_interfaces[if_name] = {
             "delta_in_bytes": delta_in,
             "delta_out_bytes": delta_out,
             "up_event": up_event,
@@ -259,7 +469,7 @@ def process_device(device, prev_status):
         new_status[if_index] = {"status": status, "in": in_val, "out": out_val, "down_count": down_count}
 
     if changes:
-        ts = datetime.now(ZoneInfo("Asia/Jakarta")).strftime('%Y-%m-%d %H:%M:%S')
+        ts = datetime.now(TZ_JAKARTA).replace(tzinfo=None).isoformat(" ", "seconds")
         alerts.append(f"🔁 *Interface Changes*\n_{ts}_\n\n" + "\n".join(changes))
 
     return {
@@ -271,19 +481,25 @@ def process_device(device, prev_status):
     }
 
 def initialize_daily_accumulator(devices):
-    acc = {"last_reset_date": "", "devices": {}}
+    return bootstrap_accumulator({"last_reset_date": "", "devices": {}}, devices)
+
+def bootstrap_accumulator(acc, devices):
+    # Add entries for devices/interfaces missing from a loaded accumulator (e.g. devices.json changed);
+    # run at startup, on each daily reset and after a devices.json reload, never per cycle,
+    # so the poll loop can index the accumulator directly
+    acc_devices = acc["devices"]
     for dev in devices:
-        acc["devices"][dev["name"]] = {
+        dev_acc = acc_devices.setdefault(dev["name"], {
             "cpu_sum": 0, "cpu_count": 0,
             "ram_sum": 0, "ram_count": 0,
-            "interfaces": {
-                if_name: {
-                    "total_in": 0, "total_out": 0,
-                    "up_events": 0, "down_events": 0,
-                    "current_status": "UNKNOWN"
-                } for if_name in dev["interfaces"].values()
-            }
-        }
+            "interfaces": {}
+        })
+        for if_name in dev["interfaces"].values():
+            dev_acc["interfaces"].setdefault(if_name, {
+                "total_in": 0, "total_out": 0,
+                "up_events": 0, "down_events": 0,
+                "current_status": "UNKNOWN"
+            })
     return acc
 
 def handle_daily_rollover(accumulator, current_date):
@@ -301,7 +517,8 @@ def handle_daily_rollover(accumulator, current_date):
         return acc
     return accumulator
 
-def save_daily_summary(accumulator, date_str):
+def build_daily_summaries(accumulator, date_str):
+    """Yield (device name, daily summary record) for every device in the accumulator."""
     for name, data in accumulator["devices"].items():
         avg_cpu = round(data["cpu_sum"] / data["cpu_count"], 2) if data["cpu_count"] else 0
         avg_ram = round(data["ram_sum"] / data["ram_count"], 2) if data["ram_count"] else 0
@@ -320,84 +537,231 @@ def save_daily_summary(accumulator, date_str):
                 } for k, v in data["interfaces"].items()
             }
         }
+        yield name, summary
+
+def save_daily_summary(accumulator, date_str):
+    for name, summary in build_daily_summaries(accumulator, date_str):
         month_dir = LOG_DIR / name / date_str[:7]
         month_dir.mkdir(parents=True, exist_ok=True)
-        with open(month_dir / "daily_summary.jsonl", "a", encoding="utf-8") as f:
-            json.dump(summary, f)
-            f.write('\n')
-
-def handle_monthly_rollover(state, now):
+        # Encode the whole record first so it lands in the file with a single write()
+        line = json_dumps(summary) + b"\n"
+        with open(month_dir / "daily_summary.jsonl", "ab") as f:
+            f.write(line)
+
+# Months waiting to be reported/archived by the background worker
+_monthly_queue = queue.Queue()
+_monthly_worker = None
+# Month -> monotonic time before which it is not queued again (in flight, or waiting to retry after a failure)
+_monthly_retry_at = {}
+MONTHLY_RETRY_DELAY = 3600
+MONTHLY_MAX_ATTEMPTS = 6
+# Month -> failed attempts so far
+_monthly_attempts = {}
+# Month -> {device name: "reported" | "archived"}, so a retry does not resend reports or re-tar logs
+_monthly_progress = {}
+_state_lock = Lock()
+
+def _mark_month_reported(state, month_str):
+    # Only called once the month was reported and archived, so a crash or failure before that retries it
+    with _state_lock:
+        state["last_reported_month"] = month_str
+        safe_write_json(state, STATE_FILE, pretty=True)
+
+def _monthly_worker_loop():
+    while True:
+        state, month_str = _monthly_queue.get()
+        try:
+            ok = rotate_monthly_logs(month_str)
+        except Exception as e:
+            logger.error(f"Monthly rollover {month_str} gagal: {e}", exc_info=True)
+            ok = False
+        try:
+            if ok:
+                _mark_month_reported(state, month_str)
+                _monthly_retry_at.pop(month_str, None)
+                _monthly_attempts.pop(month_str, None)
+                _monthly_progress.pop(month_str, None)
+                continue
+            attempts = _monthly_attempts[month_str] = _monthly_attempts.get(month_str, 0) + 1
+            if attempts < MONTHLY_MAX_ATTEMPTS:
+                logger.error(f"Monthly rollover {month_str} belum selesai, dicoba lagi dalam {MONTHLY_RETRY_DELAY}s.")
+                _monthly_retry_at[month_str] = time.monotonic() + MONTHLY_RETRY_DELAY
+            else:
+                # Stop retrying until the collector restarts; the logs stay in place for a manual look
+                logger.error(f"Monthly rollover {month_str} gagal {attempts}x, berhenti mencoba.")
+                _monthly_retry_at[month_str] = float("inf")
+                send_telegram(f"⚠️ Arsip log bulan {month_str} gagal {attempts}x. Periksa disk/izin folder {LOG_DIR}.")
+        finally:
+            _monthly_queue.task_done()
+
+def start_monthly_worker():
+    global _monthly_worker
+    if _monthly_worker is None:
+        _monthly_worker = Thread(target=_monthly_worker_loop, name="monthly", daemon=True)
+        _monthly_worker.start()
+
+def handle_monthly_rollover(state, now, background=False):
     current_month = now.strftime('%Y-%m')
     prev_month = (now.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
-    if state.get("last_reported_month") != prev_month:
-        for dev in DEVICE_LIST:
-            summary_file = LOG_DIR / dev["name"] / prev_month / "daily_summary.jsonl"
-            if not summary_file.exists():
+    if state.get("last_reported_month") == prev_month:
+        return
+    if background:
+        if time.monotonic() < _monthly_retry_at.get(prev_month, 0):
+            return
+        # Report parsing, sends and archiving can take seconds; keep them off the poll loop
+        _monthly_retry_at[prev_month] = float("inf")
+        _monthly_queue.put((state, prev_month))
+    elif rotate_monthly_logs(prev_month):
+        _mark_month_reported(state, prev_month)
+        _monthly_progress.pop(prev_month, None)
+
+def rotate_monthly_logs(month_str):
+    """Send the monthly report for every device and archive that month's logs. Only closed months are
+    rotated. Returns False if the month was refused or any archive failed."""
+    if month_str >= datetime.now(TZ_JAKARTA).strftime('%Y-%m'):
+        # The collector is still appending to this month's directory
+        logger.warning(f"Rotasi {month_str} ditolak: bulan belum selesai.")
+        return False
+    ok = True
+    progress = _monthly_progress.setdefault(month_str, {})
+    with _devices_lock:
+        devices = list(DEVICE_LIST)
+    for dev in devices:
+        name = dev["name"]
+        month_dir = LOG_DIR / name / month_str
+        step = progress.get(name)
+        if step is None:
+            if not (month_dir / "daily_summary.jsonl").exists():
+                continue
+            send_telegram(generate_monthly_report(name, month_str))
+            step = progress[name] = "reported"
+        if step == "reported":
+            if not write_archive(month_dir):
+                ok = False
                 continue
-            report = generate_monthly_report(dev["name"], prev_month)
-            send_telegram(report)
-            archive_logs(summary_file.parent)
-        state["last_reported_month"] = prev_month
-        safe_write_json(state, STATE_FILE)
+            step = progress[name] = "archived"
+        ok = remove_archived_logs(month_dir) and ok
+    return ok
+
+def report_current_month():
+    """Send a month-to-date report for every device, including today's running totals, without
+    archiving anything or touching the summary files. Returns False if there is nothing to report."""
+    month_str = datetime.now(TZ_JAKARTA).strftime('%Y-%m')
+    accumulator = safe_read_json(DAILY_ACCUMULATOR_FILE)
+    date_str = accumulator.get("last_reset_date") or ""
+    today = {}
+    if date_str.startswith(month_str):
+        today = {
+            name: summary for name, summary in build_daily_summaries(accumulator, date_str)
+            if accumulator["devices"][name]["cpu_count"] or accumulator["devices"][name]["ram_count"]
+        }
+    sent = False
+    with _devices_lock:
+        devices = list(DEVICE_LIST)
+    for dev in devices:
+        name = dev["name"]
+        extra_days = [today[name]] if name in today else []
+        if not extra_days and not (LOG_DIR / name / month_str / "daily_summary.jsonl").exists():
+            continue
+        send_telegram(generate_monthly_report(name, month_str, extra_days))
+        sent = True
+    return sent
+
+_IF_TOTALS_TEMPLATE = {
+    "total_in_bytes": 0, "total_out_bytes": 0,
+    "up_events": 0, "down_events": 0,
+    "last_known_status": "UNKNOWN"
+}
+
+def _summary_records(summary_file, extra_days):
+    if summary_file.exists():
+        with open(summary_file, "rb") as f:
+            for line in f:
+                yield json_loads(line)
+    yield from extra_days
 
-def generate_monthly_report(name, month_str):
+def generate_monthly_report(name, month_str, extra_days=()):
+    """Build the monthly report from the month's summary file plus any in-memory day records."""
     summary_file = LOG_DIR / name / month_str / "daily_summary.jsonl"
-    if not summary_file.exists():
-        return f"ℹ️ *{name}* tidak memiliki data untuk {month_str}"
+    if not summary_file.exists() and not extra_days:
+        return f"ℹ️ {bold_markdown(name)} tidak memiliki data untuk {month_str}"
 
-    cpus, rams, interfaces = [], [], {}
+    # Running sums instead of per-day lists; interface totals are created on their first sample
+    cpu_sum = ram_sum = 0.0
+    days = 0
+    interfaces = {}
     try:
-        with open(summary_file, "r") as f:
-            for line in f:
-                data = json.loads(line)
-                cpus.append(data.get("avg_cpu", 0))
-                rams.append(data.get("avg_ram", 0))
-                for if_name, v in data.get("interfaces", {}).items():
-                    if if_name not in interfaces:
-                        interfaces[if_name] = {
-                            "total_in_bytes": 0, "total_out_bytes": 0,
-                            "up_events": 0, "down_events": 0,
-                            "last_known_status": "UNKNOWN"
-                        }
-                    i = interfaces[if_name]
-                    i["total_in_bytes"] += v.get("total_in_bytes", 0)
-                    i["total_out_bytes"] += v.get("total_out_bytes", 0)
-                    i["up_events"] += v.get("up_events", 0)
-                    i["down_events"] += v.get("down_events", 0)
-                    i["last_known_status"] = v.get("final_status", "UNKNOWN")
+        for data in _summary_records(summary_file, extra_days):
+            days += 1
+            cpu_sum += data.get("avg_cpu", 0)
+            ram_sum += data.get("avg_ram", 0)
+            for if_name, v in data.get("interfaces", {}).items():
+                i = interfaces.get(if_name)
+                if i is None:
+                    i = interfaces[if_name] = _IF_TOTALS_TEMPLATE.copy()
+                get = v.get
+                i["total_in_bytes"] += get("total_in_bytes", 0)
+                i["total_out_bytes"] += get("total_out_bytes", 0)
+                i["up_events"] += get("up_events", 0)
+                i["down_events"] += get("down_events", 0)
+                i["last_known_status"] = get("final_status", "UNKNOWN")
     except Exception as e:
-        return f"❌ *{name}* laporan rusak: {e}"
+        return f"❌ {bold_markdown(name)} laporan rusak: {escape_markdown(e)}"
 
-    report = f"📊 *Laporan Bulanan - {name} ({month_str})*\n\n"
-    if cpus: report += f"🧠 CPU Avg: {sum(cpus)/len(cpus):.1f}%\n"
-    if rams: report += f"💾 RAM Avg: {sum(rams)/len(rams):.1f}%\n\n"
-    report += "🌐 *Interface Stats*\n"
+    parts = [f"📊 {bold_markdown(f'Laporan Bulanan - {name} ({month_str})')}\n\n"]
+    if days:
+        parts.append(f"🧠 CPU Avg: {cpu_sum/days:.1f}%\n")
+        parts.append(f"💾 RAM Avg: {ram_sum/days:.1f}%\n\n")
+    parts.append("🌐 *Interface Stats*\n")
     for if_name, stats in interfaces.items():
-        report += (
-            f"*{if_name}*\n"
+        parts.append(
+            f"{bold_markdown(if_name)}\n"
             f"  ✅ UP Events: {stats['up_events']}\n"
             f"  ❌ DOWN Events: {stats['down_events']}\n"
             f"  📥 IN: {format_bytes_to_gb(stats['total_in_bytes'])}\n"
             f"  📤 OUT: {format_bytes_to_gb(stats['total_out_bytes'])}\n"
             f"  ⏹️ Status: {stats['last_known_status']}\n\n"
         )
-    return report
+    return "".join(parts)
+
+ARCHIVE_COMPRESSLEVEL = 3  # JSONL compresses nearly as well at 3 as at 9, much faster
 
-def archive_logs(log_path: Path):
-    if not log_path.is_dir(): return
-    archive = log_path.with_suffix(".tar.gz")
+def archive_logs(log_path: Path) -> bool:
+    return write_archive(log_path) and remove_archived_logs(log_path)
+
+def write_archive(log_path: Path) -> bool:
+    if not log_path.is_dir(): return True
+    # Never overwrite an earlier archive of the same month; pick the next free name instead
+    archive = log_path.parent / f"{log_path.name}.tar.gz"
+    n = 1
+    while archive.exists():
+        archive = log_path.parent / f"{log_path.name}-{n}.tar.gz"
+        n += 1
     try:
-        shutil.make_archive(str(archive.with_suffix("")), "gztar", root_dir=log_path.parent, base_dir=log_path.name)
-        shutil.rmtree(log_path)
-        logger.info(f"Arsip log ke {archive}")
+        with tarfile.open(archive, "x:gz", compresslevel=ARCHIVE_COMPRESSLEVEL) as tar:
+            tar.add(log_path, arcname=log_path.name)
     except Exception as e:
         logger.error(f"Arsip gagal: {e}")
+        archive.unlink(missing_ok=True)
+        return False
+    logger.info(f"Arsip log ke {archive}")
+    return True
+
+def remove_archived_logs(log_path: Path) -> bool:
+    try:
+        shutil.rmtree(log_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(f"Gagal menghapus {log_path} setelah diarsip: {e}")
+        return False
+    return True
 
 def simulate_monthly_rollover():
     """Simulates one full month of daily data to test the monthly report and archive logic."""
     logger.info("Starting monthly rollover simulation...")
     
-    now = datetime.now(ZoneInfo("Asia/Jakarta"))
+    now = datetime.now(TZ_JAKARTA)
     prev_month_date = now.replace(day=1) - timedelta(days=1)
     
     # Clean up any previous simulation data
@@ -438,7 +802,7 @@ def simulate_monthly_rollover():
     trigger_date = now.replace(day=1)
     state = safe_read_json(STATE_FILE, {"last_reported_month": ""})
     state["last_reported_month"] = "0000-00" # Force trigger the rollover
-    safe_write_json(state, STATE_FILE)
+    safe_write_json(state, STATE_FILE, pretty=True)
     handle_monthly_rollover(state, trigger_date)
 
     logger.info("Simulation finished. Check Telegram for report and 'logs' folder for archive.")
@@ -446,19 +810,30 @@ def simulate_monthly_rollover():
 def main():
     prev_statuses = {d["name"]: safe_read_json(STATUS_DIR / f"{d['name']}.json") for d in DEVICE_LIST}
     state = safe_read_json(STATE_FILE, {"last_reported_month": ""})
-    accumulator = safe_read_json(DAILY_ACCUMULATOR_FILE) or initialize_daily_accumulator(DEVICE_LIST)
+    accumulator = bootstrap_accumulator(
+        safe_read_json(DAILY_ACCUMULATOR_FILE) or {"last_reset_date": "", "devices": {}}, DEVICE_LIST
+    )
 
     logger.info(f"🔁 Monitoring started with {MAX_WORKERS} workers.")
+    error_backoff = 0
+    start_monthly_worker()
 
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         while True:
             try:
                 start = time.monotonic()
-                now = datetime.now(ZoneInfo("Asia/Jakarta"))
-                date_str = now.strftime("%Y-%m-%d")
+                now = datetime.now(TZ_JAKARTA)
+                date_str = now.date().isoformat()
+
+                if reload_devices_if_changed():
+                    bootstrap_accumulator(accumulator, DEVICE_LIST)
+                    for dev in DEVICE_LIST:
+                        if dev["name"] not in prev_statuses:
+                            prev_statuses[dev["name"]] = safe_read_json(STATUS_DIR / f"{dev['name']}.json")
 
-                handle_monthly_rollover(state, now)
+                # Daily first, so the previous month's last day is in its summary before it is reported
                 accumulator = handle_daily_rollover(accumulator, date_str)
+                handle_monthly_rollover(state, now, background=True)
 
                 futures = {
                     executor.submit(process_device, dev, prev_statuses.get(dev["name"], {})): dev
@@ -466,6 +841,8 @@ def main():
                 }
 
                 alerts = []
+                changed = []
+                accumulated = False
                 for future in as_completed(futures):
                     dev = futures[future]
                     name = dev["name"]
@@ -473,8 +850,12 @@ def main():
                         result = future.result()
                         if result["status"] == "unreachable": continue
                         alerts.extend(result["alerts"])
-                        prev_statuses[name] = result["new_device_status"]
+                        new_device_status = result["new_device_status"]
+                        if new_device_status != prev_statuses.get(name):
+                            changed.append(name)
+                        prev_statuses[name] = new_device_status
                         acc = accumulator["devices"][name]
+                        accumulated = True
                         if result["accumulator_updates"]["cpu"] is not None:
                             acc["cpu_sum"] += result["accumulator_updates"]["cpu"]
                             acc["cpu_count"] += 1
@@ -494,28 +875,39 @@ def main():
                 if alerts:
                     send_telegram("\n\n".join(alerts))
 
-                for dev_name, state_data in prev_statuses.items():
-                    safe_write_json(state_data, STATUS_DIR / f"{dev_name}.json")
-                safe_write_json(accumulator, DAILY_ACCUMULATOR_FILE)
+                # Unreachable or idle devices keep their last status file as is
+                for dev_name in changed:
+                    safe_write_json(prev_statuses[dev_name], STATUS_DIR / f"{dev_name}.json")
+                if accumulated:
+                    safe_write_json(accumulator, DAILY_ACCUMULATOR_FILE)
 
                 elapsed = time.monotonic() - start
                 sleep_time = max(0, CHECK_INTERVAL - elapsed)
                 logger.info(f"Cycle took {elapsed:.2f}s. Sleeping {sleep_time:.2f}s.")
+                error_backoff = 0
                 time.sleep(sleep_time)
 
             except KeyboardInterrupt:
+                if _monthly_queue.unfinished_tasks:
+                    logger.info("Menunggu laporan bulanan selesai...")
+                    _monthly_queue.join()
                 logger.info("🛑 Monitoring stopped.")
                 break
             except Exception as e:
                 logger.critical(f"Fatal loop error: {e}", exc_info=True)
-                send_telegram(f"🚨 *Fatal Error*\n`{e}`", force=True)
-                time.sleep(CHECK_INTERVAL * 2)
+                if not error_backoff:
+                    # Only notify on the first failure of a streak, retries are logged
+                    send_telegram(f"🚨 *Fatal Error*\n`{e}`", force=True)
+                # Never re-poll sooner than one cycle (extra CPU samples, DOWN confirmed within seconds);
+                # double the wait with jitter while the errors persist
+                error_backoff = min(error_backoff * 2, MAX_ERROR_BACKOFF) if error_backoff else CHECK_INTERVAL
+                time.sleep(error_backoff + random.uniform(0, 1))
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         if command == "report":
-            now = datetime.now(ZoneInfo("Asia/Jakarta"))
+            now = datetime.now(TZ_JAKARTA)
             last_month = now.replace(day=1) - timedelta(days=1)
             for d in DEVICE_LIST:
                 report = generate_monthly_report(d["name"], last_month.strftime('%Y-%m'))